@@ -17,27 +17,36 @@ Usage:
 """
 
 import csv
+import heapq
 import sys
 import os
-import re
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 FPS = 32  # base-32 frames per "split-seconds"
+FPS_INV = 1.0 / FPS
 MAX_DURATION = 4.0
 GAP = 0.01  # 1/100 of a second
 MIN_DURATION = 0.01  # ensure end > start for SRT
+WRITE_BATCH = 4096  # cues per write() call
 
 def parse_timecode_base32(tc: str) -> float:
     """
     Parse a timecode of form MM:SS:FF where FF are frames at 32 fps.
     Returns seconds as float.
     """
-    m = re.fullmatch(r"(\d+):(\d+):(\d+)", tc.strip())
-    if not m:
-        raise ValueError(f"Bad timecode '{tc}' (expected MM:SS:FF base-32)")
-    mm, ss, ff = map(int, m.groups())
-    return mm * 60.0 + ss + (ff / FPS)
+    try:
+        mm, ss, ff = tc.strip().split(":")
+        if not (mm.isdigit() and ss.isdigit() and ff.isdigit()):
+            raise ValueError
+        return int(mm) * 60.0 + int(ss) + int(ff) * FPS_INV
+    except ValueError:
+        raise ValueError(f"Bad timecode '{tc}' (expected MM:SS:FF base-32)") from None
+
+# "HH:MM:SS," prefixes indexed by whole second, grown on demand by s_to_srt_ts
+# up to SEC_PREFIX_LIMIT; later times are formatted with divmod instead
+SEC_PREFIX_LIMIT = 24 * 3600
+_SEC_PREFIX: List[str] = []
 
 def s_to_srt_ts(t: float) -> str:
     """
@@ -45,20 +54,24 @@ def s_to_srt_ts(t: float) -> str:
     """
     if t < 0:
         t = 0.0
-    ms_total = int(round(t * 1000.0))
-    hh = ms_total // 3_600_000
-    rem = ms_total % 3_600_000
-    mm = rem // 60_000
-    rem = rem % 60_000
-    ss = rem // 1000
-    ms = rem % 1000
-    return f"{hh:02d}:{mm:02d}:{ss:02d},{ms:03d}"
+    sec, ms = divmod(int(round(t * 1000.0)), 1000)
+    if sec >= SEC_PREFIX_LIMIT:
+        hh, rem = divmod(sec, 3600)
+        mm, ss = divmod(rem, 60)
+        return f"{hh:02d}:{mm:02d}:{ss:02d},{ms:03d}"
+    if sec >= len(_SEC_PREFIX):
+        _SEC_PREFIX.extend(
+            f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d},"
+            for s in range(len(_SEC_PREFIX), sec + 1)
+        )
+    return f"{_SEC_PREFIX[sec]}{ms:03d}"
 
 def read_starts(starts_path: Path) -> List[Tuple[str, float]]:
     """
-    Read starts.txt lines like '01 00:00:00' and return list of (track_no_str, offset_seconds).
+    Read starts.txt lines like '01 00:00:00' and return list of (track_no_str, offset_seconds),
+    in track order. Track numbers must be '01'...'09', each at most once.
     """
-    starts = []
+    offsets: List[Optional[float]] = [None] * 10
     with starts_path.open("r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
@@ -68,19 +81,23 @@ def read_starts(starts_path: Path) -> List[Tuple[str, float]]:
             if len(parts) != 2:
                 raise ValueError(f"Bad line in starts.txt: {line}")
             track_no, tc = parts
-            offset = parse_timecode_base32(tc)
-            starts.append((track_no, offset))
-    # Sort by track number as string with zero padding (e.g., '01'...'09')
-    starts.sort(key=lambda x: x[0])
-    return starts
-
-def read_lyrics_csv(csv_path: Path) -> List[Tuple[float, str]]:
+            if not (len(track_no) == 2 and track_no.isdigit() and 1 <= int(track_no) <= 9):
+                raise ValueError(f"Bad track number in starts.txt (expected 01-09): {line}")
+            idx = int(track_no)
+            if offsets[idx] is not None:
+                raise ValueError(f"Duplicate track number in starts.txt: {line}")
+            offsets[idx] = parse_timecode_base32(tc)
+    # Slots are indexed by track number, so they are already in track order
+    return [(f"{i:02d}", offset) for i, offset in enumerate(offsets) if offset is not None]
+
+def iter_lyrics_csv(csv_path: Path) -> Iterator[Tuple[float, str]]:
     """
-    Return list of (start_seconds, text). Column 2 is ignored (always '0').
+    Yield (start_seconds, text) rows as they are read. Column 2 is ignored (always '0').
     Preserve empty lyrics lines as empty strings.
+    Rows must already be sorted by start time (as aligned CSVs are).
     """
-    rows: List[Tuple[float, str]] = []
-    with csv_path.open("r", encoding="utf-8", newline="") as f:
+    prev_start = float("-inf")
+    with csv_path.open("r", encoding="utf-8", newline="", buffering=1 << 20) as f:
         reader = csv.reader(f)
         for i, row in enumerate(reader, start=1):
             if not row:
@@ -90,70 +107,85 @@ def read_lyrics_csv(csv_path: Path) -> List[Tuple[float, str]]:
                 start = float(row[0].strip())
             except Exception as e:
                 raise ValueError(f"{csv_path.name}: line {i}: invalid start time: {row!r}") from e
-            text = ""
-            if len(row) >= 3:
-                text = row[2]
-            # Normalize None -> ""
-            text = "" if text is None else text
-            rows.append((start, text))
-    # Ensure sorted by start
-    rows.sort(key=lambda x: x[0])
-    return rows
-
-def collect_all_entries(folder: Path) -> List[Tuple[float, str]]:
+            if start < prev_start:
+                raise ValueError(f"{csv_path.name}: line {i}: start time {start} is before previous line")
+            prev_start = start
+            yield (start, row[2] if len(row) >= 3 else "")
+
+def offset_entries(rows: Iterable[Tuple[float, str]], album_offset: float) -> Iterator[Tuple[float, str]]:
+    """
+    Yield (album_start_seconds, text) for one track's (local_start, text) rows.
+    """
+    for local_start, text in rows:
+        yield (album_offset + local_start, text)
+
+def iter_all_entries(folder: Path) -> Iterator[Tuple[float, str]]:
     """
     Gather entries across all 9 CSVs with album offsets applied.
-    Returns list of (album_start_seconds, text), sorted by time.
+    Yields (album_start_seconds, text), sorted by time.
+    Each track is already sorted, so a k-way merge replaces a global sort.
     """
     starts = read_starts(folder / "starts.txt")
-    entries: List[Tuple[float, str]] = []
+    tracks: List[Iterator[Tuple[float, str]]] = []
 
     for track_no, album_offset in starts:
         fname = f"{track_no}-lyrics-aligned.csv"
         fpath = folder / fname
         if not fpath.exists():
             raise FileNotFoundError(f"Missing file: {fname}")
-        rows = read_lyrics_csv(fpath)
-        for local_start, text in rows:
-            album_time = album_offset + local_start
-            entries.append((album_time, text))
-
-    # Sort globally by album_time
-    entries.sort(key=lambda x: x[0])
-    return entries
-
-def compute_intervals(entries: List[Tuple[float, str]]) -> List[Tuple[float, float, str]]:
-    """
-    From a sorted list of (start, text), compute (start, end, text)
-    using the rules:
-      end = min(start + 3.0, next_start - 0.01)
-      minimal duration enforced = 0.01s
-    For the last entry: end = start + 3.0
-    """
-    result: List[Tuple[float, float, str]] = []
-    n = len(entries)
-    for i, (start, text) in enumerate(entries):
-        if i < n - 1:
-            next_start = entries[i + 1][0]
-            end = min(start + MAX_DURATION, next_start - GAP)
-        else:
-            end = start + MAX_DURATION
-        if end <= start:
-            end = start + MIN_DURATION
-        result.append((start, end, text))
-    return result
-
-def write_srt(intervals: List[Tuple[float, float, str]], out_path: Path) -> None:
-    """
-    Write SRT file with sequential indices.
+        tracks.append(offset_entries(iter_lyrics_csv(fpath), album_offset))
+
+    # Merge by album_time; ties keep track order, like the stable sort did
+    return heapq.merge(*tracks, key=lambda x: x[0])
+
+def format_cue(idx: int, start: float, end: float, text: str) -> str:
+    """
+    Format one SRT cue block. Text is written as-is; if empty, the blank
+    line clears any prior subtitle.
+    """
+    return f"{idx}\n{s_to_srt_ts(start)} --> {s_to_srt_ts(end)}\n{text}\n\n"
+
+def stream_write_srt(entries: Iterable[Tuple[float, str]], out_path: Path) -> int:
+    """
+    Write SRT file with sequential indices from sorted (start, text) pairs,
+    computing each end time while writing:
+      end = min(start + MAX_DURATION, next_start - GAP)
+      minimal duration enforced = MIN_DURATION
+    For the last entry: end = start + MAX_DURATION
     Include even empty-text cues to preserve timing (renders as a blank line on screen).
+    Cues are written in batches of WRITE_BATCH to a temp file that replaces out_path
+    only after the whole input was read. Returns the number of cues written.
     """
-    with out_path.open("w", encoding="utf-8", newline="\n") as out:
-        for idx, (start, end, text) in enumerate(intervals, start=1):
-            out.write(f"{idx}\n")
-            out.write(f"{s_to_srt_ts(start)} --> {s_to_srt_ts(end)}\n")
-            # Write text as-is. If empty, leave it blank to clear any prior subtitle.
-            out.write(f"{text}\n\n")
+    idx = 0
+    buf: List[str] = []
+    # Stream into a sibling temp file; out_path is only replaced once every row parsed
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8", newline="\n") as out:
+            # One cue of lookahead: a cue is formatted once the next start is known
+            prev: Optional[Tuple[float, str]] = None
+            for next_start, next_text in entries:
+                if prev is not None:
+                    start, text = prev
+                    end = min(start + MAX_DURATION, next_start - GAP)
+                    if end <= start:
+                        end = start + MIN_DURATION
+                    idx += 1
+                    buf.append(format_cue(idx, start, end, text))
+                    if len(buf) >= WRITE_BATCH:
+                        out.write("".join(buf))
+                        buf.clear()
+                prev = (next_start, next_text)
+            if prev is not None:
+                start, text = prev
+                idx += 1
+                buf.append(format_cue(idx, start, start + MAX_DURATION, text))
+            out.write("".join(buf))
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return idx
 
 def main():
     if len(sys.argv) != 3:
@@ -172,10 +204,8 @@ def main():
         print(f"starts.txt not found in folder: {in_dir}", file=sys.stderr)
         sys.exit(3)
 
-    entries = collect_all_entries(in_dir)
-    intervals = compute_intervals(entries)
-    write_srt(intervals, out_file)
-    print(f"Wrote {out_file} with {len(intervals)} cues.")
+    count = stream_write_srt(iter_all_entries(in_dir), out_file)
+    print(f"Wrote {out_file} with {count} cues.")
 
 if __name__ == "__main__":
     main()
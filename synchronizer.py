@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
-import argparse, subprocess, tempfile, os, time, sys
+import argparse, array, subprocess, tempfile, os, time, sys, wave
 import simpleaudio as sa
-from typing import List, Tuple
+from typing import IO, List, Optional, Sequence, Tuple
 
 HELP = """Tap the start time for each lyric line while the song plays.
 Controls:
   ENTER    -> mark current line
   u+ENTER  -> undo last
-  p+ENTER  -> pause/resume (playback restarts from beginning; timer continues)
+  p+ENTER  -> pause/resume (playback continues from the pause point)
   q+ENTER  -> abort and save
 """
+MENU = "ENTER mark | u undo | p pause/resume | q abort+save\n"
 
 def load_lyrics(path: str) -> List[str]:
     with open(path, "r", encoding="utf-8") as f:
@@ -32,13 +33,33 @@ def transcode_to_wav(input_path: str, rate: int, channels: int) -> Tuple[str, fl
     return out, dur
 
 def load_waveobject(wav_path: str) -> sa.WaveObject:
-    return sa.WaveObject.from_wave_file(wav_path)
-
-def write_output(out_path: str, stamps: List[Tuple[float, str]], offset: float = 0.0) -> None:
+    # Decode once; resuming plays a view into the same PCM buffer
+    with wave.open(wav_path, "rb") as wf:
+        frames = wf.readframes(wf.getnframes())
+        return sa.WaveObject(frames, wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+
+def play_from(wave_obj: sa.WaveObject, pos: float) -> Optional[sa.PlayObject]:
+    frame_bytes = wave_obj.num_channels * wave_obj.bytes_per_sample
+    offset = max(0, int(pos * wave_obj.sample_rate)) * frame_bytes
+    if offset >= len(wave_obj.audio_data):
+        return None
+    tail = memoryview(wave_obj.audio_data)[offset:]
+    return sa.WaveObject(tail, wave_obj.num_channels, wave_obj.bytes_per_sample,
+                         wave_obj.sample_rate).play()
+
+def format_stamp(t: float, line: str, offset: float = 0.0) -> str:
+    t2 = max(0.0, t + offset)
+    return f'{t2:.3f},0,"{line.replace("\"","\\\"")}"\n'
+
+def write_output(out_path: str, times: Sequence[float], texts: Sequence[str], offset: float = 0.0) -> None:
     with open(out_path, "w", encoding="utf-8") as out:
-        for t, line in stamps:
-            t2 = max(0.0, t + offset)
-            out.write(f'{t2:.3f},0,"{line.replace("\"","\\\"")}"\n')
+        out.write("".join(format_stamp(t, line, offset) for t, line in zip(times, texts)))
+
+def append_output(out: IO[str], times: Sequence[float], texts: Sequence[str], offset: float = 0.0) -> None:
+    # Durable append for autosave: only the new stamps hit the disk
+    out.write("".join(format_stamp(t, line, offset) for t, line in zip(times, texts)))
+    out.flush()
+    os.fsync(out.fileno())
 
 def main():
     ap = argparse.ArgumentParser(description="Tap-in lyric line start times.",
@@ -55,10 +76,16 @@ def main():
 
     wav_path = None
     play = None
-    stamps: List[Tuple[float, str]] = []
+    # Stamps as parallel arrays: tap times and the lines they mark
+    times = array.array("d")
+    texts: List[str] = []
+    autosave_file: Optional[IO[str]] = None
+    saved = 0  # stamps already in the autosave file
 
     try:
         lines = load_lyrics(args.lyrics)
+        # Lines are fixed for the session, so every prompt can be built up front
+        prompts = [f'\n---\nLine {k+1}/{len(lines)}: "{line}"\n{MENU}' for k, line in enumerate(lines)]
         wav_path, duration = transcode_to_wav(args.audio, args.rate, args.channels)
         wave_obj = load_waveobject(wav_path)
 
@@ -79,23 +106,33 @@ def main():
             return time.perf_counter() - t0 - accumulated_pause
 
         while i < len(lines):
-            print("\n---"); sys.stdout.flush()
-            print(f'Line {i+1}/{len(lines)}: "{lines[i]}"'); sys.stdout.flush()
-            print("ENTER mark | u undo | p pause/resume | q abort+save"); sys.stdout.flush()
-            try:
-                cmd = input().strip().lower()
-            except EOFError:
+            sys.stdout.write(prompts[i])
+            sys.stdout.flush()
+            raw = sys.stdin.readline()
+            # Take the timestamp as soon as ENTER arrives, before any processing
+            t = now()
+            if not raw:
                 print("Input closed; saving current results…")
                 break
+            cmd = raw.strip().lower()
 
             if cmd == "q":
                 print("Aborting and saving partial results…")
                 break
 
             if cmd == "u":
-                if stamps:
-                    t,l = stamps.pop(); i -= 1
+                if times:
+                    t,l = times.pop(), texts.pop(); i -= 1
                     print(f"Undid {t:.3f}s -> {l!r}")
+                    # The undone stamp was already autosaved: rewrite, then keep appending
+                    if autosave_file and saved > len(times):
+                        try:
+                            autosave_file.close(); autosave_file = None
+                            write_output(args.out, times, texts, offset=args.offset)
+                            saved = len(times)
+                            autosave_file = open(args.out, "a", encoding="utf-8")
+                        except Exception as e:
+                            print(f"(Autosave failed: {e})")
                 else:
                     print("Nothing to undo.")
                 continue
@@ -113,7 +150,7 @@ def main():
                     if pause_start is not None:
                         accumulated_pause += time.perf_counter() - pause_start
                     try:
-                        play = wave_obj.play()  # restarts from beginning; timer continues
+                        play = play_from(wave_obj, now())
                     except Exception as e:
                         print(f"Warning: could not resume playback: {e}")
                     paused = False
@@ -123,26 +160,36 @@ def main():
             if paused:
                 print("You are paused. Press p to resume, then tap."); continue
 
-            t = now()
-            stamps.append((t, lines[i]))
+            times.append(t); texts.append(lines[i])
             print(f"Marked {t:.3f}s")
             i += 1
 
             # Optional autosave
-            if autosave_every and (len(stamps) % autosave_every == 0):
+            if autosave_every and (len(times) % autosave_every == 0):
                 try:
-                    write_output(args.out, stamps, offset=args.offset)
-                    print(f"(Autosaved {len(stamps)} lines to {args.out})")
+                    if autosave_file is None:
+                        autosave_file = open(args.out, "w", encoding="utf-8")
+                        saved = 0
+                    append_output(autosave_file, times[saved:], texts[saved:], offset=args.offset)
+                    saved = len(times)
+                    print(f"(Autosaved {len(times)} lines to {args.out})")
                 except Exception as e:
                     print(f"(Autosave failed: {e})")
+                    # Start over with a full rewrite at the next autosave
+                    if autosave_file:
+                        try: autosave_file.close()
+                        except Exception: pass
+                        autosave_file = None
 
         # Stop playback (avoid wait_done hangs)
         if play and play.is_playing():
             try: play.stop()
             except Exception: pass
 
-        write_output(args.out, stamps, offset=args.offset)
-        print(f"\nSaved {len(stamps)} lines to {args.out}")
+        if autosave_file:
+            autosave_file.close(); autosave_file = None
+        write_output(args.out, times, texts, offset=args.offset)
+        print(f"\nSaved {len(times)} lines to {args.out}")
 
     except KeyboardInterrupt:
         print("\nInterrupted. Saving results…")
@@ -150,11 +197,16 @@ def main():
             try: play.stop()
             except Exception: pass
         try:
-            write_output(args.out, stamps, offset=args.offset)
-            print(f"Saved {len(stamps)} lines to {args.out}")
+            if autosave_file:
+                autosave_file.close(); autosave_file = None
+            write_output(args.out, times, texts, offset=args.offset)
+            print(f"Saved {len(times)} lines to {args.out}")
         except Exception as e:
             print(f"Failed to write output: {e}")
     finally:
+        if autosave_file:
+            try: autosave_file.close()
+            except Exception: pass
         if wav_path and os.path.exists(wav_path):
             try: os.remove(wav_path)
             except Exception: pass
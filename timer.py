@@ -1,32 +1,64 @@
 import os
-import csv
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 # Get the current directory
 current_directory = os.path.dirname(os.path.abspath(__file__))
 
-# Iterate over all .csv files in the current directory
-for filename in os.listdir(current_directory):
-    if filename.endswith('.csv'):
-        # Full path to the file
-        file_path = os.path.join(current_directory, filename)
+def shift_file(file_path):
+    # Stream the lines into a temporary file next to the original
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+    try:
+        with open(file_path, mode='r', newline='', encoding='utf-8') as infile, \
+             open(fd, mode='w', newline='', encoding='utf-8') as outfile:
+            for line in infile:
+                # Only the first column (time) changes; the rest of the line is kept as-is
+                comma = line.find(',')
+                if comma < 0:
+                    comma = len(line.rstrip('\r\n'))
+                try:
+                    # Shift the time in the first column by 0.5 seconds
+                    t = float(line[:comma].strip().strip('"'))
+                except ValueError:
+                    # In case of an empty or malformed row, skip modification
+                    outfile.write(line)
+                    continue
+                outfile.write(f"{t + 0.5}{line[comma:]}")
 
-        # Read the content of the CSV file
-        with open(file_path, mode='r', newline='', encoding='utf-8') as infile:
-            reader = csv.reader(infile)
-            rows = list(reader)
+        # Replace the original file with the updated content, keeping its permissions
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
-        # Shift the times in the first column by 0.5 seconds
-        for row in rows:
-            try:
-                # Modify the first column (time) by adding 0.5 seconds
-                row[0] = str(float(row[0]) + 0.5)
-            except ValueError:
-                # In case of an empty or malformed row, skip modification
-                continue
+if __name__ == '__main__':
+    # Collect all .csv files in the current directory
+    with os.scandir(current_directory) as entries:
+        csv_files = [e for e in entries if e.is_file() and e.name.endswith('.csv')]
+    filenames = [e.name for e in csv_files]
+    file_paths = [e.path for e in csv_files]
 
-        # Write the updated content back to the same file
-        with open(file_path, mode='w', newline='', encoding='utf-8') as outfile:
-            writer = csv.writer(outfile)
-            writer.writerows(rows)
+    # Each file is independent, so shift them in parallel; a single file needs no pool
+    if len(file_paths) <= 1:
+        for filename, file_path in zip(filenames, file_paths):
+            shift_file(file_path)
+            print(f"Processed {filename}")
+    else:
+        workers = min(len(file_paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(shift_file, path) for path in file_paths]
 
-        print(f"Processed {filename}")
+        # Report every file before failing: shifting is not idempotent, so a rerun
+        # must know which files were already processed
+        errors = []
+        for filename, future in zip(filenames, futures):
+            error = future.exception()
+            if error is None:
+                print(f"Processed {filename}")
+            else:
+                print(f"Failed {filename}: {error}")
+                errors.append(error)
+        if errors:
+            raise errors[0]